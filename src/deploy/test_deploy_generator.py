@@ -1,49 +1,96 @@
 # test_deploy_stage_generator.py
 
+from types import MappingProxyType
+
 import pytest
 from deploy_generator import DeployStageGenerator
 
 
+# ============ КОНФИГУРАЦИИ ============
+
+# Собираются один раз при импорте и доступны только на чтение —
+# тесты, которым нужна модификация, делают {**config, ...}
+_BASIC_CONFIG = MappingProxyType({
+    'language': 'python',
+    'version': '3.11',
+    'base_image': 'python:3.11-alpine',
+    'dockerfile_exists': True,
+    'dockerfile_info': MappingProxyType({
+        'base_images': ('python:3.11-alpine',),
+        'final_image': 'python:3.11-alpine',
+        'is_multistage': False
+    }),
+    'artifact_paths': MappingProxyType({
+        'artifact_path': 'dist/',
+        'artifact_name': 'myapp',
+        'build_command': 'python setup.py build',
+        'artifact_type': 'binary'
+    }),
+    'language_info': MappingProxyType({}),
+    'services': (
+        MappingProxyType({'name': 'frontend', 'path': './frontend'}),
+        MappingProxyType({'name': 'backend', 'path': './backend'}),
+        MappingProxyType({'name': 'bot', 'path': './bot'}),
+    ),
+    'is_monorepo': False
+})
+
+_MONOREPO_CONFIG = MappingProxyType({**_BASIC_CONFIG, 'is_monorepo': True})
+
+SYNC_TARGETS = ("docker-registry", "nexus", "artifactory", "gitlab-artifacts")
+DEPLOY_TARGETS = ("server", "github")
+
+# Подстроки, которые обязаны присутствовать в отрендеренном стейдже
+_SERVER_REQUIRED = ("deploy_production:", "docker compose", "scp", "ssh")
+_GITHUB_REQUIRED = ("release_github:", "curl", "myapp")
+_GITHUB_WARNING_REQUIRED = ("WARNING", "необычная комбинация")
+
+
+# ============ FIXTURES ============
+
+@pytest.fixture(scope="session")
+def basic_config():
+    """Базовая конфигурация проекта"""
+    return _BASIC_CONFIG
+
+
+@pytest.fixture(params=[False, True], ids=["single", "monorepo"])
+def is_monorepo(request):
+    """Ось single/monorepo"""
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def rendered_matrix():
+    """Восемь комбинаций (sync, deploy) для базовой конфигурации и единственная
+    monorepo-комбинация, которую читают тесты; рендер один раз за сессию.
+
+    Ошибка рендера сохраняется вместо результата — падает только тест
+    этой комбинации (см. _rendered), а не вся фикстура.
+    """
+    cases = [(sync, deploy, "basic", _BASIC_CONFIG) for sync in SYNC_TARGETS for deploy in DEPLOY_TARGETS]
+    cases.append(("docker-registry", "server", "monorepo", _MONOREPO_CONFIG))
+
+    out = {}
+    for sync, deploy, flavor, config in cases:
+        try:
+            out[(sync, deploy, flavor)] = DeployStageGenerator(config, sync=sync, deploy=deploy).generate()
+        except Exception as e:
+            out[(sync, deploy, flavor)] = e
+    return out
+
+
+def _rendered(matrix, key) -> str:
+    """Результат рендера комбинации; сохранённая ошибка пробрасывается здесь"""
+    result = matrix[key]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
 class TestDeployStageGenerator:
     """Тесты для генератора deploy-стейджей"""
 
-    # ============ FIXTURES ============
-
-    @pytest.fixture
-    def basic_config(self):
-        """Базовая конфигурация проекта"""
-        return {
-            'language': 'python',
-            'version': '3.11',
-            'base_image': 'python:3.11-alpine',
-            'dockerfile_exists': True,
-            'dockerfile_info': {
-                'base_images': ['python:3.11-alpine'],
-                'final_image': 'python:3.11-alpine',
-                'is_multistage': False
-            },
-            'artifact_paths': {
-                'artifact_path': 'dist/',
-                'artifact_name': 'myapp',
-                'build_command': 'python setup.py build',
-                'artifact_type': 'binary'
-            },
-            'language_info': {},
-            'services': [
-                {'name': 'frontend', 'path': './frontend'},
-                {'name': 'backend', 'path': './backend'},
-                {'name': 'bot', 'path': './bot'},
-            ],
-            'is_monorepo': False
-        }
-
-    @pytest.fixture
-    def monorepo_config(self, basic_config):
-        """Конфигурация для монорепозитория"""
-        config = basic_config.copy()
-        config['is_monorepo'] = True
-        return config
-
     # ============ SERVER DEPLOY ============
 
     @pytest.mark.parametrize("sync", [
@@ -52,24 +99,21 @@ class TestDeployStageGenerator:
         "artifactory",
         "gitlab-artifacts"
     ])
-    def test_server_deploy_templates(self, basic_config, sync):
+    def test_server_deploy_templates(self, rendered_matrix, sync):
         """Тест: генерация deploy-стейджа для server"""
-        generator = DeployStageGenerator(basic_config, sync=sync, deploy="server")
-        result = generator.generate()
+        result = _rendered(rendered_matrix, (sync, "server", "basic"))
 
-        assert "deploy_production:" in result
-        assert "docker compose" in result
-        assert "scp" in result
-        assert "ssh" in result
+        for s in _SERVER_REQUIRED:
+            assert s in result
 
-    def test_server_deploy_monorepo(self, monorepo_config):
-        """Тест: генерация deploy-стейджа для монорепозитория"""
-        generator = DeployStageGenerator(monorepo_config, sync="docker-registry", deploy="server")
-        result = generator.generate()
+    def test_server_deploy_services(self, rendered_matrix, is_monorepo):
+        """Тест: сервисы монорепозитория попадают в compose только для monorepo"""
+        flavor = "monorepo" if is_monorepo else "basic"
+        result = _rendered(rendered_matrix, ("docker-registry", "server", flavor))
 
-        assert "frontend:" in result
-        assert "backend:" in result
-        assert "bot:" in result
+        assert ("frontend:" in result) == is_monorepo
+        assert ("backend:" in result) == is_monorepo
+        assert ("bot:" in result) == is_monorepo
 
     # ============ GITHUB RELEASE ============
 
@@ -78,22 +122,19 @@ class TestDeployStageGenerator:
         "artifactory",
         "gitlab-artifacts"
     ])
-    def test_github_release_templates(self, basic_config, sync):
+    def test_github_release_templates(self, rendered_matrix, sync):
         """Тест: генерация github-release стейджа"""
-        generator = DeployStageGenerator(basic_config, sync=sync, deploy="github")
-        result = generator.generate()
+        result = _rendered(rendered_matrix, (sync, "github", "basic"))
 
-        assert "release_github:" in result
-        assert "curl" in result
-        assert "myapp" in result
+        for s in _GITHUB_REQUIRED:
+            assert s in result
 
-    def test_docker_registry_to_github_warning(self, basic_config):
+    def test_docker_registry_to_github_warning(self, rendered_matrix):
         """Тест: предупреждение при docker-registry + github"""
-        generator = DeployStageGenerator(basic_config, sync="docker-registry", deploy="github")
-        result = generator.generate()
+        result = _rendered(rendered_matrix, ("docker-registry", "github", "basic"))
 
-        assert "WARNING" in result
-        assert "необычная комбинация" in result
+        for s in _GITHUB_WARNING_REQUIRED:
+            assert s in result
 
     # ============ EDGE CASES ============
 
@@ -106,8 +147,7 @@ class TestDeployStageGenerator:
 
     def test_config_without_services(self, basic_config):
         """Тест: конфигурация без services"""
-        config = basic_config.copy()
-        config['services'] = []
+        config = {**basic_config, 'services': []}
 
         generator = DeployStageGenerator(config, sync="docker-registry", deploy="server")
         result = generator.generate()
@@ -116,8 +156,7 @@ class TestDeployStageGenerator:
 
     def test_config_without_artifact_paths(self, basic_config):
         """Тест: конфигурация без artifact_paths"""
-        config = basic_config.copy()
-        config['artifact_paths'] = None
+        config = {**basic_config, 'artifact_paths': None}
 
         generator = DeployStageGenerator(config, sync="nexus", deploy="server")
         result = generator.generate()
@@ -126,8 +165,7 @@ class TestDeployStageGenerator:
 
     def test_config_without_dockerfile_info(self, basic_config):
         """Тест: конфигурация без dockerfile_info"""
-        config = basic_config.copy()
-        config['dockerfile_info'] = None
+        config = {**basic_config, 'dockerfile_info': None}
 
         generator = DeployStageGenerator(config, sync="docker-registry", deploy="server")
         result = generator.generate()
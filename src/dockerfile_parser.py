@@ -1,8 +1,26 @@
 # dockerfile_parser.py
 
 import os
+import re
+from functools import cached_property, lru_cache
+from pathlib import Path
 from typing import Dict, List, Optional
 
+# FROM / EXPOSE инструкции: один проход регуляркой вместо списка строк.
+# Инструкции Dockerfile регистронезависимы, поэтому IGNORECASE
+_DIRECTIVE_RE = re.compile(r'^[ \t]*(FROM|EXPOSE)[ \t]+(.*)$', re.MULTILINE | re.IGNORECASE)
+
+# Порт EXPOSE: целый токен из цифр, допускается суффикс протокола (80, 80/tcp)
+_PORT_RE = re.compile(r'(?<!\S)(\d+)(?=/|\s|$)')
+
+
+@lru_cache(maxsize=128)
+def _parse_dockerfile_cached(path: str, mtime_ns: int, size: int) -> 'DockerfileParser':
+    """Парсит Dockerfile один раз на (path, mtime_ns, size) — при изменении файла ключ меняется"""
+    parser = DockerfileParser.__new__(DockerfileParser)
+    parser._parse_from_path(path)
+    return parser
+
 
 class DockerfileParser:
     """Парсер Dockerfile"""
@@ -10,8 +28,39 @@ class DockerfileParser:
     def __init__(self, dockerfile_path: str):
         self.dockerfile_path = dockerfile_path
         self._validate_file()
+        st = os.stat(dockerfile_path)
+        parsed = _parse_dockerfile_cached(dockerfile_path, st.st_mtime_ns, st.st_size)
+        self.content = parsed.content
+        # Свои копии: списки отдаются наружу и не должны портить кэш
+        self._base_images = list(parsed._base_images)
+        self._ports = list(parsed._ports)
+
+    def _parse_from_path(self, path: str) -> None:
+        self.dockerfile_path = path
         self.content = self._read_file()
-        self.lines = self.content.split('\n')
+        self._scan()
+
+    def _scan(self) -> None:
+        """Один проход по инструкциям: собирает FROM образы и EXPOSE порты"""
+        self._base_images = []
+        self._ports = []
+        for match in _DIRECTIVE_RE.finditer(self.content):
+            handler = self._DIRECTIVE_HANDLERS[match.group(1).upper()]
+            handler(self, match.group(2))
+
+    def _handle_from(self, rest: str) -> None:
+        parts = rest.split()
+        image = parts[0] if parts else None
+        if image and image != 'scratch':
+            self._base_images.append(image)
+
+    def _handle_expose(self, rest: str) -> None:
+        self._ports.extend(int(port) for port in _PORT_RE.findall(rest))
+
+    _DIRECTIVE_HANDLERS = {
+        'FROM': _handle_from,
+        'EXPOSE': _handle_expose,
+    }
 
     def _validate_file(self) -> None:
         if not os.path.exists(self.dockerfile_path):
@@ -19,57 +68,38 @@ class DockerfileParser:
 
     def _read_file(self) -> str:
         try:
-            with open(self.dockerfile_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            content = Path(self.dockerfile_path).read_bytes().decode('utf-8')
         except IOError as e:
             raise IOError(f"❌ Не удалось прочитать Dockerfile: {e}")
+        # Бинарное чтение не переводит \r\n и \r — нормализуем, как в env_analyzer,
+        # иначе ^ в _DIRECTIVE_RE не сработает после голого \r
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
 
     def extract_base_images(self) -> List[str]:
         """Извлекает FROM инструкции"""
-        images = []
-        for line in self.lines:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if line.startswith('FROM '):
-                rest = line[5:].strip()
-                image = rest.split()[0] if rest.split() else None
-                if image and image != 'scratch':
-                    images.append(image)
-        return images
+        return self._base_images
 
     def get_final_base_image(self) -> str:
         """Возвращает финальный базовый образ"""
-        images = self.extract_base_images()
-        if not images:
+        if not self._base_images:
             raise ValueError("❌ В Dockerfile нет FROM инструкции!")
-        return images[-1]
+        return self._base_images[-1]
 
     def is_multistage(self) -> bool:
         """Проверяет multi-stage build"""
-        return len(self.extract_base_images()) > 1
+        return len(self._base_images) > 1
 
     def extract_exposed_ports(self) -> List[int]:
         """Извлекает EXPOSE инструкции"""
-        ports = []
-        for line in self.lines:
-            line = line.strip()
-            if line.startswith('EXPOSE '):
-                port_part = line[7:].strip()
-                for port_str in port_part.split():
-                    port_str = port_str.split('/')[0]
-                    try:
-                        port = int(port_str)
-                        ports.append(port)
-                    except ValueError:
-                        pass
-        return ports
+        return self._ports
 
     def get_primary_port(self) -> Optional[int]:
-        ports = self.extract_exposed_ports()
-        return ports[0] if ports else 3000
+        return self._ports[0] if self._ports else 3000
 
-    def get_summary(self) -> Dict:
+    @cached_property
+    def summary(self) -> Dict:
         return {
             'base_images': self.extract_base_images(),
             'final_image': self.get_final_base_image(),
@@ -77,3 +107,6 @@ class DockerfileParser:
             'ports': self.extract_exposed_ports(),
             'primary_port': self.get_primary_port(),
         }
+
+    def get_summary(self) -> Dict:
+        return self.summary
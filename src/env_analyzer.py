@@ -2,32 +2,65 @@
 
 import os
 import re
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from itertools import islice
 from typing import Dict, List
 
+# Строка KEY=VALUE: первый непробельный символ — не '#', ключ до первого '='
+_ENV_LINE_RE = re.compile(r'^[^\S\n]*((?:[^\s#=][^=\n]*)?)=(.*)$', re.MULTILINE)
+
+
+@dataclass(slots=True, frozen=True)
+class EnvVar:
+    """Переменная окружения из .env файла"""
+    value: str
+    type: str
+    source: str
+    line: int
+    is_sensitive: bool
+    is_required: bool
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
 
 class EnvAnalyzer:
     """Анализирует .env файлы и генерирует GitLab CI/CD переменные"""
 
-    # Паттерны для определения типа переменной
-    SENSITIVE_PATTERNS = [
-        r'.*password.*',
-        r'.*secret.*',
-        r'.*key.*',
-        r'.*token.*',
-        r'.*api.*key.*',
-        r'.*private.*',
-        r'.*credential.*',
-        r'.*auth.*',
-    ]
-
-    DATABASE_PATTERNS = [
-        r'.*database.*',
-        r'.*db.*',
-        r'.*postgres.*',
-        r'.*mysql.*',
-        r'.*mongo.*',
-        r'.*redis.*',
-    ]
+    # Подстроки для определения типа переменной (без учёта регистра)
+    _SENSITIVE_RE = re.compile(r'password|secret|key|token|private|credential|auth', re.IGNORECASE)
+    _DB_RE = re.compile(r'database|db|postgres|mysql|mongo|redis', re.IGNORECASE)
+
+    _REQUIRED_VARS = frozenset({
+        'DATABASE_URL',
+        'DATABASE_HOST',
+        'DB_HOST',
+        'POSTGRES_HOST',
+        'REDIS_URL',
+        'SECRET_KEY',
+        'JWT_SECRET',
+    })
+
+    _CONFIG_KEYS = frozenset({'debug', 'environment', 'env', 'node_env'})
+
+    # Порядок важен: при повторе ключа побеждает файл, прочитанный позже
+    _ENV_FILES = (
+        '.env',
+        '.env.example',
+        '.env.local',
+        '.env.development',
+        '.env.production',
+        '.env.test',
+    )
+    _ENV_FILES_SET = frozenset(_ENV_FILES)
+
+    # Отметки для таблицы документации, индексируются bool'ом
+    _YES_NO = ('❌', '✅')
+
+    # Типы не-секретных переменных, которые попадают в variables .gitlab-ci.yml
+    _CI_SECTION_TYPES = ('config', 'general', 'port')
 
     def __init__(self, project_path: str = "."):
         self.project_path = project_path
@@ -39,76 +72,109 @@ class EnvAnalyzer:
         """Находим и парсим все .env файлы"""
         print("🔍 Анализирую переменные окружения...")
 
-        # Ищем .env файлы
-        env_patterns = [
-            '.env',
-            '.env.example',
-            '.env.local',
-            '.env.development',
-            '.env.production',
-            '.env.test',
-        ]
-
-        for pattern in env_patterns:
-            env_path = os.path.join(self.project_path, pattern)
-            if os.path.exists(env_path):
+        # Ищем .env файлы одним чтением директории, заодно запоминаем размеры
+        try:
+            with os.scandir(self.project_path) as it:
+                found = {
+                    e.name: e.stat().st_size
+                    for e in it if e.name in self._ENV_FILES_SET and e.is_file()
+                }
+        except OSError:
+            found = {}
+
+        for pattern in self._ENV_FILES:
+            if pattern in found:
                 self.env_files.append(pattern)
-                self._parse_env_file(env_path, pattern)
+                # Пустые заглушки (частый случай для .env.example) не читаем
+                if found[pattern]:
+                    self._parse_env_file(os.path.join(self.project_path, pattern), pattern)
+
+        # Группируем и считаем один раз: env_vars после анализа не меняются
+        self._by_type = defaultdict(list)
+        sensitive_count = 0
+        required_count = 0
+        for var_name, var_info in self.env_vars.items():
+            self._by_type[var_info.type].append((var_name, var_info))
+            if var_info.is_sensitive:
+                sensitive_count += 1
+            if var_info.is_required:
+                required_count += 1
+        self._by_type_sorted = sorted(self._by_type.items())
+
+        self._summary = {
+            'env_files': self.env_files,
+            'total_vars': len(self.env_vars),
+            'sensitive_vars': sensitive_count,
+            'required_vars': required_count,
+            # Публичная форма сводки — словарь словарей, как и раньше
+            'variables': {name: var.as_dict() for name, var in self.env_vars.items()},
+        }
 
         if self.env_vars:
-            print(f"✅ Найдено переменных окружения: {len(self.env_vars)}")
-            for var_name, var_info in list(self.env_vars.items())[:5]:
-                print(f"   → {var_name} ({var_info['type']})")
+            out = [f"✅ Найдено переменных окружения: {len(self.env_vars)}"]
+            for var_name, var_info in islice(self.env_vars.items(), 5):
+                out.append(f"   → {var_name} ({var_info.type})")
             if len(self.env_vars) > 5:
-                print(f"   ... и ещё {len(self.env_vars) - 5}")
+                out.append(f"   ... и ещё {len(self.env_vars) - 5}")
+            sys.stdout.write("\n".join(out) + "\n")
         else:
-            print("⚠️  Переменные окружения не найдены")
-            print("   💡 Рекомендуется создать .env.example")
+            sys.stdout.write(
+                "⚠️  Переменные окружения не найдены\n"
+                "   💡 Рекомендуется создать .env.example\n"
+            )
 
     def _parse_env_file(self, filepath: str, filename: str):
         """Парсит .env файл"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-
-                    # Пропускаем комментарии и пустые строки
-                    if not line or line.startswith('#'):
-                        continue
-
-                    # Парсим KEY=VALUE
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip().strip('"').strip("'")
-
-                        # Определяем тип переменной
-                        var_type = self._classify_variable(key, value)
-
-                        self.env_vars[key] = {
-                            'value': value if not self._is_sensitive(key) else '***',
-                            'type': var_type,
-                            'source': filename,
-                            'line': line_num,
-                            'is_sensitive': self._is_sensitive(key),
-                            'is_required': self._is_required(key),
-                        }
+            with open(filepath, 'rb') as f:
+                data = f.read()
+
+            # Нет ни одного присваивания — нечего разбирать
+            if b'=' not in data:
+                return
+
+            content = data.decode('utf-8')
+            if '\r' in content:
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+            # Комментарии и пустые строки регулярка пропускает сама
+            line_num = 1
+            last_pos = 0
+            for match in _ENV_LINE_RE.finditer(content):
+                line_num += content.count('\n', last_pos, match.start())
+                last_pos = match.start()
+
+                key = match.group(1).strip()
+                value = match.group(2).strip().strip('"').strip("'")
+
+                # Определяем тип переменной
+                is_sensitive = self._is_sensitive(key)
+                var_type = self._classify_variable(key, value, is_sensitive)
+
+                self.env_vars[key] = EnvVar(
+                    value=value if not is_sensitive else '***',
+                    type=var_type,
+                    source=filename,
+                    line=line_num,
+                    is_sensitive=is_sensitive,
+                    is_required=self._is_required(key),
+                )
         except Exception as e:
             print(f"⚠️  Ошибка парсинга {filepath}: {e}")
 
-    def _classify_variable(self, key: str, value: str) -> str:
+    def _classify_variable(self, key: str, value: str, is_sensitive: bool) -> str:
         """Определяет тип переменной"""
-        key_lower = key.lower()
-
-        if self._is_sensitive(key):
+        if is_sensitive:
             return 'secret'
-        elif any(re.match(pattern, key_lower) for pattern in self.DATABASE_PATTERNS):
+        if self._DB_RE.search(key):
             return 'database'
-        elif key_lower.startswith('ci_') or key_lower.startswith('gitlab_'):
+
+        key_lower = key.lower()
+        if key_lower.startswith(('ci_', 'gitlab_')):
             return 'ci'
-        elif key_lower in ['debug', 'environment', 'env', 'node_env']:
+        elif key_lower in self._CONFIG_KEYS:
             return 'config'
-        elif key_lower.endswith('_url') or key_lower.endswith('_endpoint'):
+        elif key_lower.endswith(('_url', '_endpoint')):
             return 'url'
         elif key_lower.endswith('_port'):
             return 'port'
@@ -117,39 +183,23 @@ class EnvAnalyzer:
 
     def _is_sensitive(self, key: str) -> bool:
         """Проверяет, является ли переменная чувствительной"""
-        key_lower = key.lower()
-        return any(re.match(pattern, key_lower) for pattern in self.SENSITIVE_PATTERNS)
+        return self._SENSITIVE_RE.search(key) is not None
 
     def _is_required(self, key: str) -> bool:
         """Определяет, обязательна ли переменная"""
-        required_vars = [
-            'DATABASE_URL',
-            'DATABASE_HOST',
-            'DB_HOST',
-            'POSTGRES_HOST',
-            'REDIS_URL',
-            'SECRET_KEY',
-            'JWT_SECRET',
-        ]
-        return key.upper() in required_vars
+        return key.upper() in self._REQUIRED_VARS
 
     def generate_gitlab_variables_documentation(self) -> str:
         """Генерирует документацию для GitLab CI/CD переменных"""
         if not self.env_vars:
             return ""
 
-        doc = "# GitLab CI/CD Variables\n\n"
-        doc += "## Требуемые переменные окружения\n\n"
-        doc += "Добавьте следующие переменные в GitLab:\n\n"
-        doc += "**Путь:** `Settings → CI/CD → Variables`\n\n"
-
-        # Группируем по типам
-        by_type = {}
-        for var_name, var_info in self.env_vars.items():
-            var_type = var_info['type']
-            if var_type not in by_type:
-                by_type[var_type] = []
-            by_type[var_type].append((var_name, var_info))
+        parts = [
+            "# GitLab CI/CD Variables\n\n",
+            "## Требуемые переменные окружения\n\n",
+            "Добавьте следующие переменные в GitLab:\n\n",
+            "**Путь:** `Settings → CI/CD → Variables`\n\n",
+        ]
 
         # Выводим по группам
         type_names = {
@@ -162,78 +212,75 @@ class EnvAnalyzer:
             'general': '📋 Общие',
         }
 
-        for var_type, vars_list in sorted(by_type.items()):
-            doc += f"### {type_names.get(var_type, var_type.title())}\n\n"
-            doc += "| Variable | Type | Protected | Masked | Example |\n"
-            doc += "|----------|------|-----------|--------|----------|\n"
-
-            for var_name, var_info in vars_list:
-                protected = '✅' if var_info['is_sensitive'] else '❌'
-                masked = '✅' if var_info['is_sensitive'] else '❌'
-                example = var_info['value'] if not var_info['is_sensitive'] else '<SET_YOUR_VALUE>'
-
-                doc += f"| `{var_name}` | Variable | {protected} | {masked} | `{example}` |\n"
-
-            doc += "\n"
+        for var_type, vars_list in self._by_type_sorted:
+            parts.append(f"### {type_names.get(var_type, var_type.title())}\n\n")
+            parts.append("| Variable | Type | Protected | Masked | Example |\n")
+            parts.append("|----------|------|-----------|--------|----------|\n")
+
+            # Строки группы — одним join; Protected и Masked совпадают
+            # (оба определяются чувствительностью), отметку берём один раз
+            parts.append("".join(
+                f"| `{var_name}` | Variable | {yn} | {yn} | "
+                f"`{'<SET_YOUR_VALUE>' if var_info.is_sensitive else var_info.value}` |\n"
+                for var_name, var_info in vars_list
+                for yn in (self._YES_NO[var_info.is_sensitive],)
+            ))
+            parts.append("\n")
 
         # Инструкция
-        doc += "---\n\n"
-        doc += "## Как добавить переменные в GitLab\n\n"
-        doc += "1. Откройте ваш проект в GitLab\n"
-        doc += "2. Перейдите: **Settings → CI/CD**\n"
-        doc += "3. Разверните секцию **Variables**\n"
-        doc += "4. Нажмите **Add variable**\n"
-        doc += "5. Заполните:\n"
-        doc += "   - **Key**: Имя переменной (например, `DATABASE_URL`)\n"
-        doc += "   - **Value**: Значение переменной\n"
-        doc += "   - **Type**: `Variable`\n"
-        doc += "   - **Protect variable**: ✅ для чувствительных данных\n"
-        doc += "   - **Mask variable**: ✅ для секретов (они не будут видны в логах)\n"
-        doc += "6. Нажмите **Add variable**\n\n"
-
-        return doc
+        parts.extend((
+            "---\n\n",
+            "## Как добавить переменные в GitLab\n\n",
+            "1. Откройте ваш проект в GitLab\n",
+            "2. Перейдите: **Settings → CI/CD**\n",
+            "3. Разверните секцию **Variables**\n",
+            "4. Нажмите **Add variable**\n",
+            "5. Заполните:\n",
+            "   - **Key**: Имя переменной (например, `DATABASE_URL`)\n",
+            "   - **Value**: Значение переменной\n",
+            "   - **Type**: `Variable`\n",
+            "   - **Protect variable**: ✅ для чувствительных данных\n",
+            "   - **Mask variable**: ✅ для секретов (они не будут видны в логах)\n",
+            "6. Нажмите **Add variable**\n\n",
+        ))
+
+        return "".join(parts)
 
     def generate_gitlab_ci_env_section(self) -> str:
         """Генерирует секцию variables для .gitlab-ci.yml"""
         if not self.env_vars:
             return ""
 
-        # Только НЕ-чувствительные переменные идут в .gitlab-ci.yml
-        non_sensitive = {
-            k: v for k, v in self.env_vars.items()
-            if not v['is_sensitive'] and v['type'] in ['config', 'general', 'port']
-        }
+        # Только НЕ-чувствительные переменные идут в .gitlab-ci.yml (чувствительные
+        # всегда имеют тип 'secret'); порядок — как в .env
+        rows = [
+            f"  {var_name}: \"{var_info.value}\"\n"
+            for var_name, var_info in self.env_vars.items()
+            if var_info.type in self._CI_SECTION_TYPES
+        ]
 
-        if not non_sensitive:
+        if not rows:
             return ""
 
-        yml = "variables:\n"
-        yml += "  # Non-sensitive environment variables\n"
-        for var_name, var_info in non_sensitive.items():
-            yml += f"  {var_name}: \"{var_info['value']}\"\n"
+        parts = ["variables:\n", "  # Non-sensitive environment variables\n"]
+        parts.extend(rows)
 
-        yml += "\n  # Sensitive variables (passwords, secrets, keys) should be set in:\n"
-        yml += "  # GitLab → Settings → CI/CD → Variables\n"
-        yml += "  # See GITLAB_VARIABLES.md for details\n"
+        parts.append("\n  # Sensitive variables (passwords, secrets, keys) should be set in:\n")
+        parts.append("  # GitLab → Settings → CI/CD → Variables\n")
+        parts.append("  # See GITLAB_VARIABLES.md for details\n")
 
-        return yml
+        return "".join(parts)
 
     def generate_env_example(self) -> str:
         """Генерирует .env.example файл"""
         if not self.env_vars:
             return ""
 
-        content = "# Environment Variables Example\n"
-        content += "# Copy this file to .env and fill in your values\n"
-        content += "# DO NOT COMMIT .env TO GIT!\n\n"
-
-        # Группируем по типам
-        by_type = {}
-        for var_name, var_info in self.env_vars.items():
-            var_type = var_info['type']
-            if var_type not in by_type:
-                by_type[var_type] = []
-            by_type[var_type].append((var_name, var_info))
+        parts = [
+            "# Environment Variables Example\n",
+            "# Copy this file to .env and fill in your values\n",
+            "# DO NOT COMMIT .env TO GIT!\n\n",
+        ]
 
         type_names = {
             'secret': 'Secrets (DO NOT COMMIT REAL VALUES)',
@@ -245,25 +292,19 @@ class EnvAnalyzer:
             'general': 'General Settings',
         }
 
-        for var_type, vars_list in sorted(by_type.items()):
-            content += f"# {type_names.get(var_type, var_type.title())}\n"
+        for var_type, vars_list in self._by_type_sorted:
+            parts.append(f"# {type_names.get(var_type, var_type.title())}\n")
 
             for var_name, var_info in vars_list:
-                if var_info['is_sensitive']:
-                    content += f"{var_name}=<YOUR_{var_name}_HERE>\n"
+                if var_info.is_sensitive:
+                    parts.append(f"{var_name}=<YOUR_{var_name}_HERE>\n")
                 else:
-                    content += f"{var_name}={var_info['value']}\n"
+                    parts.append(f"{var_name}={var_info.value}\n")
 
-            content += "\n"
+            parts.append("\n")
 
-        return content
+        return "".join(parts)
 
     def get_summary(self) -> Dict:
         """Возвращает сводку"""
-        return {
-            'env_files': self.env_files,
-            'total_vars': len(self.env_vars),
-            'sensitive_vars': len([v for v in self.env_vars.values() if v['is_sensitive']]),
-            'required_vars': len([v for v in self.env_vars.values() if v['is_required']]),
-            'variables': self.env_vars,
-        }
+        return self._summary
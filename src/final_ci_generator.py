@@ -1,8 +1,13 @@
 # src/final_ci_generator.py
 
+import sys
+from types import MappingProxyType
+
+from jinja2 import Template
+
 from project_analyzer import ProjectAnalyzer
 from build_generator import BuildStageGenerator
-from lint_generator import LintStageGenerator
+from lint_generator import get_lint_generator
 from sonarqube_generator import SonarQubeStageGenerator
 from test_generator import TestStageGenerator
 from security_generator import SecurityStageGenerator
@@ -12,6 +17,69 @@ from deploy.deploy_generator import DeployStageGenerator
 class FinalCIGenerator:
     """Финальный генератор CI/CD"""
 
+    STAGES = ['build', 'test', 'lint', 'sonarqube', 'security', 'integration']
+
+    # (имя stage'а, функция self -> YAML stage'а); порядок = порядок в конфиге
+    STAGE_SPEC = (
+        ('build', lambda self: BuildStageGenerator(self.config, self.sync_target).get_output_string()),
+        ('test', lambda self: TestStageGenerator(
+            self.config['language'],
+            self.config['version'],
+            self.config['dockerfile_info'],
+        ).get_output_string()),
+        ('lint', lambda self: get_lint_generator(
+            self.config['language'],
+            self.config['version']
+        ).get_output_string()),
+        ('sonarqube', lambda self: SonarQubeStageGenerator(
+            self.config['language'],
+            self.config['version']
+        ).get_output_string()),
+        ('security', lambda self: SecurityStageGenerator(
+            self.config['language'],
+            self.config['version'],
+            has_dockerfile=self.config['dockerfile_exists']
+        ).get_output_string()),
+        ('deploy', lambda self: DeployStageGenerator(
+            self.config, self.sync_target, self.deploy_target
+        ).generate()),
+    )
+
+    # Блок variables по sync_target; '_default' — для артефактных таргетов
+    _VARS_BLOCK = MappingProxyType({
+        'docker-registry': (
+            '  DOCKER_IMAGE_TAG: "$CI_REGISTRY_IMAGE:$CI_COMMIT_SHA"\n'
+            '  DOCKER_IMAGE_LATEST: "$CI_REGISTRY_IMAGE:latest"\n'
+            '  SSH_PORT: "22"\n'
+            '  DEPLOY_ENV: "production"\n'
+            '  SONAR_HOST_URL: "http://sonarqube:9000"\n'
+        ),
+        '_default': (
+            '  ARTIFACT_VERSION: "$CI_PIPELINE_ID"\n'
+            '  SONAR_HOST_URL: "http://sonarqube:9000"\n'
+        ),
+    })
+
+    # Каркас .gitlab-ci.yml, компилируется один раз при загрузке класса
+    CONFIG_TEMPLATE = Template("""stages:
+{% for stage in stages %}
+  - {{ stage }}
+{% endfor %}
+
+{% if env_section %}
+# ========== ENVIRONMENT VARIABLES ==========
+{{ env_section }}
+{% endif %}
+# ========== CI/CD VARIABLES ==========
+variables:
+{{ variables_block }}
+{% for stage_name, stage_content in stages_content %}
+# ========== {{ stage_name | upper }} STAGE ==========
+{{ stage_content }}
+
+{% endfor %}
+""", trim_blocks=True)
+
     def __init__(self, analyzer: ProjectAnalyzer, sync_target: str, deploy_target: str = None):
         """
         Args:
@@ -30,49 +98,11 @@ class FinalCIGenerator:
 
         print("🏗️  Генерирую stage'и...\n")
 
-        # Build
-        print("  → Генерирую BUILD stage...")
-        build_gen = BuildStageGenerator(self.config, self.sync_target)
-        self.stages['build'] = build_gen.get_output_string()
-
-        # Test (Unit + Integration)
-        print("  → Генерирую TEST stages...")
-        test_gen = TestStageGenerator(
-            self.config['language'],
-            self.config['version'],
-            self.config['dockerfile_info'],
-        )
-        self.stages['test'] = test_gen.get_output_string()
-
-        # Lint
-        print("  → Генерирую LINT stage...")
-        lint_gen = LintStageGenerator(
-            self.config['language'],
-            self.config['version']
-        )
-        self.stages['lint'] = lint_gen.get_output_string()
-
-        # SonarQube
-        print("  → Генерирую SONARQUBE stage...")
-        sonar_gen = SonarQubeStageGenerator(
-            self.config['language'],
-            self.config['version']
-        )
-        self.stages['sonarqube'] = sonar_gen.get_output_string()
-
-        # Security
-        print("  → Генерирую SECURITY stage...")
-        security_gen = SecurityStageGenerator(
-            self.config['language'],
-            self.config['version'],
-            has_dockerfile=self.config['dockerfile_exists']
-        )
-        self.stages['security'] = security_gen.get_output_string()
-
-        # Deploy stage
-        print("  → Генерирую DEPLOY stage...")
-        deploy_gen = DeployStageGenerator(self.config, self.sync_target, self.deploy_target)
-        self.stages['deploy'] = deploy_gen.generate()
+        # Порядок stage'ей задаёт STAGE_SPEC; каждый заголовок печатается
+        # непосредственно перед выводом своего генератора
+        for name, build in self.STAGE_SPEC:
+            print(f"  → Генерирую {name.upper()} stage...")
+            self.stages[name] = build(self)
 
         print("\n✅ Все stage'и готовы\n")
 
@@ -80,49 +110,21 @@ class FinalCIGenerator:
         """Собирает финальный .gitlab-ci.yml"""
 
         # Формируем список stages
-        stages_list = "  - build\n  - test\n  - lint\n  - sonarqube\n  - security\n  - integration"
+        stages = list(self.STAGES)
         if self.deploy_target:
-            stages_list += "\n  - deploy"
-
-        # Начинаем конфиг
-        config = f"""stages:
-{stages_list}
-
-"""
+            stages.append('deploy')
 
         # ========== НОВОЕ: Добавляем переменные окружения из .env ==========
+        env_section = ""
         if hasattr(self.analyzer, 'env_analyzer') and self.analyzer.env_analyzer.env_vars:
             env_section = self.analyzer.env_analyzer.generate_gitlab_ci_env_section()
-            if env_section:
-                config += "# ========== ENVIRONMENT VARIABLES ==========\n"
-                config += env_section
-                config += "\n"
-
-        # Стандартные переменные в зависимости от sync_target
-        config += "# ========== CI/CD VARIABLES ==========\n"
-        config += "variables:\n"
-
-        if self.sync_target == 'docker-registry':
-            config += """  DOCKER_IMAGE_TAG: "$CI_REGISTRY_IMAGE:$CI_COMMIT_SHA"
-  DOCKER_IMAGE_LATEST: "$CI_REGISTRY_IMAGE:latest"
-  SSH_PORT: "22"
-  DEPLOY_ENV: "production"
-  SONAR_HOST_URL: "http://sonarqube:9000"
-"""
-        else:
-            config += """  ARTIFACT_VERSION: "$CI_PIPELINE_ID"
-  SONAR_HOST_URL: "http://sonarqube:9000"
-"""
-
-        config += "\n"
-
-        # Добавляем все stage'и
-        for stage_name, stage_content in self.stages.items():
-            config += f"# ========== {stage_name.upper()} STAGE ==========\n"
-            config += stage_content
-            config += "\n\n"
 
-        return config
+        return self.CONFIG_TEMPLATE.render(
+            stages=stages,
+            env_section=env_section,
+            variables_block=self._VARS_BLOCK.get(self.sync_target, self._VARS_BLOCK['_default']),
+            stages_content=self.stages.items(),
+        )
 
     def save(self, filepath: str = ".gitlab-ci.yml") -> str:
         config = self.assemble_config()
@@ -132,54 +134,58 @@ class FinalCIGenerator:
         return filepath
 
     def print_summary(self):
-        print("=" * 70)
-        print("📋 ИТОГОВЫЙ КОНФИГ")
-        print("=" * 70)
+        # Собираем строки и выводим одним write
+        out = []
+        out.append("=" * 70)
+        out.append("📋 ИТОГОВЫЙ КОНФИГ")
+        out.append("=" * 70)
 
-        print(f"\n📦 Проект:")
-        print(f"   Язык: {self.config['language']}")
-        print(f"   Версия: {self.config['version']}")
+        out.append(f"\n📦 Проект:")
+        out.append(f"   Язык: {self.config['language']}")
+        out.append(f"   Версия: {self.config['version']}")
 
         # ========== НОВОЕ: Вывод фреймворка ==========
         if self.config.get('framework'):
-            print(f"   Фреймворк: {self.config['framework']}")
+            out.append(f"   Фреймворк: {self.config['framework']}")
 
-        print(f"   Dockerfile: {'✅ Найден' if self.config['dockerfile_exists'] else '❌ Не найден'}")
+        out.append(f"   Dockerfile: {'✅ Найден' if self.config['dockerfile_exists'] else '❌ Не найден'}")
 
         if self.config.get('docker_compose_exists'):
             compose_info = self.config.get('docker_compose_info', {})
-            print(f"   docker-compose.yml: ✅ Найден")
-            print(f"      Файл: {compose_info.get('filename')}")
-            print(f"      Сервисов: {compose_info.get('service_count', 0)}")
+            out.append(f"   docker-compose.yml: ✅ Найден")
+            out.append(f"      Файл: {compose_info.get('filename')}")
+            out.append(f"      Сервисов: {compose_info.get('service_count', 0)}")
             if compose_info.get('services'):
-                print(f"      Список: {', '.join(compose_info['services'])}")
+                out.append(f"      Список: {', '.join(compose_info['services'])}")
         else:
-            print(f"   docker-compose.yml: ❌ Не найден")
+            out.append(f"   docker-compose.yml: ❌ Не найден")
 
         if self.config.get('is_monorepo'):
-            print(f"\n   🏗️  Тип: Monorepo")
-            print(f"   Сервисов с Dockerfile: {len(self.config['services'])}")
+            out.append(f"\n   🏗️  Тип: Monorepo")
+            out.append(f"   Сервисов с Dockerfile: {len(self.config['services'])}")
             for svc in self.config['services']:
-                print(f"      → {svc['name']} ({svc['path']})")
+                out.append(f"      → {svc['name']} ({svc['path']})")
 
         # ========== НОВОЕ: Вывод статистики по .env ==========
         if self.config.get('env_summary', {}).get('total_vars', 0) > 0:
             env_sum = self.config['env_summary']
-            print(f"\n🔐 Переменные окружения:")
-            print(f"   Всего: {env_sum['total_vars']}")
-            print(f"   Секреты: {env_sum['sensitive_vars']}")
-            print(f"   Обязательные: {env_sum['required_vars']}")
+            out.append(f"\n🔐 Переменные окружения:")
+            out.append(f"   Всего: {env_sum['total_vars']}")
+            out.append(f"   Секреты: {env_sum['sensitive_vars']}")
+            out.append(f"   Обязательные: {env_sum['required_vars']}")
             if env_sum.get('env_files'):
-                print(f"   Файлы: {', '.join(env_sum['env_files'])}")
+                out.append(f"   Файлы: {', '.join(env_sum['env_files'])}")
 
-        print(f"\n🔄 Конфигурация:")
-        print(f"   Sync target: {self.sync_target}")
+        out.append(f"\n🔄 Конфигурация:")
+        out.append(f"   Sync target: {self.sync_target}")
         if self.deploy_target:
-            print(f"   Deploy target: {self.deploy_target}")
+            out.append(f"   Deploy target: {self.deploy_target}")
 
-        print(f"\n🎯 Stages:")
+        out.append(f"\n🎯 Stages:")
         for stage in ['build', 'test', 'lint', 'sonarqube', 'security', 'integration', 'deploy']:
             if stage in self.stages:
-                print(f"   ✅ {stage}")
+                out.append(f"   ✅ {stage}")
+
+        out.append("\n" + "=" * 70)
 
-        print("\n" + "=" * 70)
+        sys.stdout.write("\n".join(out) + "\n")
@@ -1,29 +1,36 @@
 # src/lint_generator.py
 
+from functools import lru_cache
 from typing import Dict
-from jinja2 import Template
 
 
 class LintStageGenerator:
     """Генератор lint stage с отладочным выводом"""
 
+    # Шаблоны в формате str.format: литеральные фигурные скобки удвоены
     LINT_TEMPLATES = {
         'python': """lint:
   stage: lint
-  image: python:{{ version }}-slim
+  image: python:{version}-slim
+  variables:
+    PIP_CACHE_DIR: "${{CI_PROJECT_DIR}}/.cache/pip"
+  cache:
+    key: "pip-lint-{version}"
+    paths:
+      - .cache/pip
   before_script:
     - echo "================================================"
-    - echo "LINT STAGE - Python {{ version }}"
+    - echo "LINT STAGE - Python {version}"
     - echo "================================================"
     - echo "📦 Installing linters: flake8, pylint, black"
-    - pip install --no-cache-dir -q flake8 pylint black isort
+    - pip install -q flake8 pylint black isort
   script:
     - echo ""
     - echo "🔍 Running flake8 (syntax errors & undefined names)..."
     - flake8 . --count --select=E9,F63,F7,F82 --show-source --statistics || true
     - echo ""
     - echo "🔍 Running pylint (code quality)..."
-    - pylint **/*.py --exit-zero || true
+    - pylint --recursive=y . --exit-zero || true
     - echo ""
     - echo "🔍 Checking code formatting with black..."
     - black --check --diff . || true
@@ -37,15 +44,14 @@ class LintStageGenerator:
     - main
     - merge_requests
   tags:
-    - docker
-""",
+    - docker""",
 
         'go': """lint:
   stage: lint
-  image: golang:{{ version }}-alpine
+  image: golang:{version}-alpine
   before_script:
     - echo "================================================"
-    - echo "LINT STAGE - Go {{ version }}"
+    - echo "LINT STAGE - Go {version}"
     - echo "================================================"
     - echo "📦 Installing golangci-lint..."
     - apk add --no-cache git
@@ -67,15 +73,14 @@ class LintStageGenerator:
     - main
     - merge_requests
   tags:
-    - docker
-""",
+    - docker""",
 
         'typescript': """lint:
   stage: lint
-  image: node:{{ version }}-alpine
+  image: node:{version}-alpine
   before_script:
     - echo "================================================"
-    - echo "LINT STAGE - TypeScript (Node {{ version }})"
+    - echo "LINT STAGE - TypeScript (Node {version})"
     - echo "================================================"
     - echo "📦 Installing dependencies..."
     - npm ci
@@ -88,7 +93,7 @@ class LintStageGenerator:
     - npx tsc --noEmit || true
     - echo ""
     - echo "🔍 Checking code formatting with Prettier..."
-    - npx prettier --check "**/*.{ts,tsx,json}" || true
+    - npx prettier --check "**/*.{{ts,tsx,json}}" || true
     - echo ""
     - echo "✅ Lint stage completed!"
   allow_failure: true
@@ -96,15 +101,14 @@ class LintStageGenerator:
     - main
     - merge_requests
   tags:
-    - docker
-""",
+    - docker""",
 
         'java': """lint:
   stage: lint
-  image: maven:3.9-eclipse-temurin-{{ version }}
+  image: maven:3.9-eclipse-temurin-{version}
   before_script:
     - echo "================================================"
-    - echo "LINT STAGE - Java {{ version }}"
+    - echo "LINT STAGE - Java {version}"
     - echo "================================================"
   script:
     - echo ""
@@ -123,15 +127,14 @@ class LintStageGenerator:
     - main
     - merge_requests
   tags:
-    - docker
-""",
+    - docker""",
 
         'kotlin': """lint:
   stage: lint
-  image: maven:3.9-eclipse-temurin-{{ version }}
+  image: maven:3.9-eclipse-temurin-{version}
   before_script:
     - echo "================================================"
-    - echo "LINT STAGE - Kotlin (Java {{ version }})"
+    - echo "LINT STAGE - Kotlin (Java {version})"
     - echo "================================================"
   script:
     - echo ""
@@ -147,24 +150,30 @@ class LintStageGenerator:
     - main
     - merge_requests
   tags:
-    - docker
-""",
+    - docker""",
     }
 
     def __init__(self, language: str, version: str):
         self.language = language
         self.version = version
-        print(f"  → Генерирую LINT stage для {language}:{version}")
 
     def generate(self) -> str:
+        print(f"  → Генерирую LINT stage для {self.language}:{self.version}")
+
         template_str = self.LINT_TEMPLATES.get(self.language)
 
         if template_str:
-            template = Template(template_str)
-            return template.render(version=self.version)
+            # Единственная подстановка — {version}, Jinja здесь не нужна
+            return template_str.format(version=self.version)
         else:
             print(f"     ⚠️  Нет lint конфигурации для {self.language}")
             return ""
 
     def get_output_string(self) -> str:
         return self.generate()
+
+
+@lru_cache(maxsize=32)
+def get_lint_generator(language: str, version: str) -> LintStageGenerator:
+    """Один генератор на пару (язык, версия) — экземпляры не хранят изменяемого состояния"""
+    return LintStageGenerator(language, version)
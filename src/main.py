@@ -1,13 +1,29 @@
 # src/main.py
 
-import os
 import sys
 import argparse
 import tempfile
-import shutil
-from git import Repo
-from project_analyzer import ProjectAnalyzer
-from final_ci_generator import FinalCIGenerator
+from itertools import product
+from pathlib import Path
+from types import MappingProxyType
+
+
+def _emit(*lines: str):
+    """Выводит несколько строк одним write вместо серии print()"""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _write_if_changed(path: str, text: str):
+    """Пишет файл одним write; если содержимое совпадает с текущим — не трогает его"""
+    data = text.encode('utf-8')
+    target = Path(path)
+    try:
+        if target.stat().st_size == len(data) and target.read_bytes() == data:
+            return
+    except FileNotFoundError:
+        pass
+    target.write_bytes(data)
+
 
 # ============ ВАЛИДАЦИЯ КОМБИНАЦИЙ ============
 
@@ -20,12 +36,38 @@ VALID_COMBINATIONS = {
 }
 
 
+# Все допустимые пары (sync, deploy) — проверка одним хэш-поиском
+_VALID_PAIRS = frozenset((s, d) for s, ds in VALID_COMBINATIONS.items() for d in ds)
+
+
 def validate_combination(sync: str, deploy: str) -> bool:
     """Проверяет валидность комбинации sync + deploy"""
-    if sync not in VALID_COMBINATIONS:
-        return False
+    return (sync, deploy) in _VALID_PAIRS
+
 
-    return deploy in VALID_COMBINATIONS[sync]
+SYNC_CHOICES = ('docker-registry', 'nexus', 's3', 'artifactory', 'gitlab-artifacts')
+DEPLOY_CHOICES = ('server', 'k8s', 'github')
+
+
+def _validation_status(sync: str, deploy: str, dockerfile_exists: bool, docker_gen: bool):
+    """Результат валидации:
+    'combination' — неверная пара sync/deploy,
+    'dockerfile' — для docker-registry нет Dockerfile и нет --docker-gen,
+    'dockerfile_gen' — Dockerfile нет, но он будет сгенерирован,
+    None — всё в порядке
+    """
+    if not validate_combination(sync, deploy):
+        return 'combination'
+    if sync == 'docker-registry' and not dockerfile_exists:
+        return 'dockerfile_gen' if docker_gen else 'dockerfile'
+    return None
+
+
+# Все (sync, deploy, dockerfile_exists, docker_gen) → результат проверки, считается при импорте
+VALIDATION_TABLE = MappingProxyType({
+    key: _validation_status(*key)
+    for key in product(SYNC_CHOICES, DEPLOY_CHOICES, (False, True), (False, True))
+})
 
 
 def suggest_valid_deploy(sync: str) -> list:
@@ -35,10 +77,11 @@ def suggest_valid_deploy(sync: str) -> list:
 
 # ============ АВТООПРЕДЕЛЕНИЕ ============
 
-def auto_detect_sync_deploy(analyzer: ProjectAnalyzer) -> dict:
-    """Автоматически определяет sync и deploy на основе анализа проекта"""
+# Типы артефактов, которые публикуются в репозиторий, а не собираются в образ
+_ARTIFACT_TYPES = frozenset({'jar', 'wheel', 'npm', 'gem'})
 
-    summary = analyzer.get_summary()
+def auto_detect_sync_deploy(summary: dict) -> dict:
+    """Автоматически определяет sync и deploy по сводке ProjectAnalyzer.get_summary()"""
 
     # По умолчанию
     sync = 'docker-registry'
@@ -61,7 +104,7 @@ def auto_detect_sync_deploy(analyzer: ProjectAnalyzer) -> dict:
 
     # Если артефакты (jar, whl, tgz) → nexus + github
     artifact_type = summary.get('artifact_paths', {}).get('artifact_type')
-    if artifact_type in ['jar', 'wheel', 'npm', 'gem']:
+    if artifact_type in _ARTIFACT_TYPES:
         sync = 'nexus'
         deploy = 'github'
 
@@ -103,32 +146,53 @@ def main():
 
     parser.add_argument('--repo', help='Git repository URL or local path')
     parser.add_argument('--sync', default=None,
-                        choices=['docker-registry', 'nexus', 's3', 'artifactory', 'gitlab-artifacts'],
+                        choices=SYNC_CHOICES,
                         help='Artifact sync target (auto-detect if not specified)')
     parser.add_argument('--deploy', default=None,
-                        choices=['server', 'k8s', 'github'],
+                        choices=DEPLOY_CHOICES,
                         help='Deployment target (auto-detect if not specified)')
-    parser.add_argument('--docker-gen', action='store_true',
+    parser.add_argument('--docker-gen', action=argparse.BooleanOptionalAction, default=False,
                         help='Generate Dockerfile if missing')
     parser.add_argument('--output', default='/output',
                         help='Output directory')
 
     args = parser.parse_args()
 
-    print("=" * 70)
-    print("🚀 ГЕНЕРАТОР GITLAB CI/CD")
-    print("=" * 70)
+    # Тяжёлые модули (jinja2, yaml, генераторы) нужны только после успешного
+    # разбора аргументов — --help и ошибки CLI обходятся без них
+    from project_analyzer import ProjectAnalyzer
+    from final_ci_generator import FinalCIGenerator
+
+    # Удалённый репозиторий: клонируем в начале и удаляем клон в конце
+    is_remote = bool(args.repo) and args.repo.startswith(('http', 'git@'))
+
+    _emit(
+        "=" * 70,
+        "🚀 ГЕНЕРАТОР GITLAB CI/CD",
+        "=" * 70,
+    )
 
     # ============ Шаг 0: Клонирование репозитория ============
 
-    if args.repo and (args.repo.startswith('http') or args.repo.startswith('git@')):
-        print("\nШАГ 0: Клонирование репозитория")
-        print("-" * 70)
-        print(f"📥 Клонирую репозиторий: {args.repo}")
+    if is_remote:
+        _emit(
+            "\nШАГ 0: Клонирование репозитория",
+            "-" * 70,
+            f"📥 Клонирую репозиторий: {args.repo}",
+        )
 
-        temp_dir = tempfile.mkdtemp(prefix='cicd_gen_')
+        # TemporaryDirectory удалит клон и при выходе через sys.exit на любом шаге
+        temp_dir_obj = tempfile.TemporaryDirectory(prefix='cicd_gen_', ignore_cleanup_errors=True)
+        temp_dir = temp_dir_obj.name
         try:
-            Repo.clone_from(args.repo, temp_dir)
+            # GitPython тяжёлый — импортируем только когда действительно клонируем
+            from git import Repo
+
+            # Для анализа нужно только рабочее дерево — история и теги не нужны
+            Repo.clone_from(
+                args.repo, temp_dir,
+                multi_options=['--depth=1', '--filter=blob:none', '--single-branch', '--no-tags', '--quiet'],
+            )
             print(f"✅ Репозиторий склонирован в {temp_dir}")
             project_path = temp_dir
         except Exception as e:
@@ -141,15 +205,19 @@ def main():
 
     # ============ Шаг 1: Анализ проекта ============
 
-    print("\nШАГ 1: Анализ проекта")
-    print("-" * 70)
+    _emit(
+        "\nШАГ 1: Анализ проекта",
+        "-" * 70,
+    )
 
     try:
         analyzer = ProjectAnalyzer(project_path, docker_gen=args.docker_gen)
         summary = analyzer.get_summary()
 
-        print(f"\n✅ Язык: {summary['language']}")
-        print(f"✅ Версия: {summary['version']}")
+        _emit(
+            f"\n✅ Язык: {summary['language']}",
+            f"✅ Версия: {summary['version']}",
+        )
 
         if summary.get('framework'):
             print(f"✅ Фреймворк: {summary['framework']}")
@@ -170,38 +238,54 @@ def main():
 
     # ============ Шаг 2: Определение sync и deploy ============
 
-    print("\nШАГ 2: Определение конфигурации")
-    print("-" * 70)
+    _emit(
+        "\nШАГ 2: Определение конфигурации",
+        "-" * 70,
+    )
 
     # Если не указаны явно → автоопределение
     if args.sync is None or args.deploy is None:
         print("⚙️  Автоопределение sync и deploy...")
-        auto_config = auto_detect_sync_deploy(analyzer)
+        auto_config = auto_detect_sync_deploy(summary)
 
         sync = args.sync or auto_config['sync']
         deploy = args.deploy or auto_config['deploy']
 
-        print(f"✅ Автоопределено:")
-        print(f"   → sync: {sync}")
-        print(f"   → deploy: {deploy}")
-        print(f"   → причина: {auto_config['reason']}")
+        _emit(
+            f"✅ Автоопределено:",
+            f"   → sync: {sync}",
+            f"   → deploy: {deploy}",
+            f"   → причина: {auto_config['reason']}",
+        )
     else:
         sync = args.sync
         deploy = args.deploy
-        print(f"✅ Указано вручную:")
-        print(f"   → sync: {sync}")
-        print(f"   → deploy: {deploy}")
+        _emit(
+            f"✅ Указано вручную:",
+            f"   → sync: {sync}",
+            f"   → deploy: {deploy}",
+        )
 
     # ============ Шаг 3: Валидация комбинации ============
 
-    print("\nШАГ 3: Валидация")
-    print("-" * 70)
+    _emit(
+        "\nШАГ 3: Валидация",
+        "-" * 70,
+    )
+
+    # Ключи таблицы — строго bool; неизвестная пара sync/deploy — неверная комбинация
+    status = VALIDATION_TABLE.get(
+        (sync, deploy, bool(summary.get('dockerfile_exists')), bool(args.docker_gen)),
+        'combination'
+    )
 
     # Проверка комбинации sync + deploy
-    if not validate_combination(sync, deploy):
-        print(f"❌ Неверная комбинация: {sync} → {deploy}")
-        print()
-        print("Валидные комбинации:")
+    if status == 'combination':
+        _emit(
+            f"❌ Неверная комбинация: {sync} → {deploy}",
+            "",
+            "Валидные комбинации:",
+        )
         for s, d_list in VALID_COMBINATIONS.items():
             print(f"  {s:20} → {', '.join(d_list)}")
         print()
@@ -217,22 +301,28 @@ def main():
     print(f"✅ Комбинация {sync} → {deploy} валидна")
 
     # Проверка Dockerfile
-    if not summary['dockerfile_exists'] and sync == 'docker-registry':
-        print("⚠️  Dockerfile не найден!")
-        if args.docker_gen:
-            print("✅ Dockerfile будет сгенерирован автоматически")
-        else:
-            print("❌ Для docker-registry требуется Dockerfile")
-            print("   💡 Используйте --docker-gen для автоматической генерации")
-            print("   💡 Или используйте --sync nexus/artifactory/gitlab-artifacts")
-            sys.exit(1)
+    if status == 'dockerfile':
+        _emit(
+            "⚠️  Dockerfile не найден!",
+            "❌ Для docker-registry требуется Dockerfile",
+            "   💡 Используйте --docker-gen для автоматической генерации",
+            "   💡 Или используйте --sync nexus/artifactory/gitlab-artifacts",
+        )
+        sys.exit(1)
+    elif status == 'dockerfile_gen':
+        _emit(
+            "⚠️  Dockerfile не найден!",
+            "✅ Dockerfile будет сгенерирован автоматически",
+        )
 
     print("✅ Валидация пройдена")
 
     # ============ Шаг 4: Генерация CI/CD ============
 
-    print("\nШАГ 4: Генерация CI/CD")
-    print("-" * 70)
+    _emit(
+        "\nШАГ 4: Генерация CI/CD",
+        "-" * 70,
+    )
 
     try:
         generator = FinalCIGenerator(analyzer, sync, deploy)
@@ -245,70 +335,85 @@ def main():
 
     # ============ Шаг 5: Сохранение ============
 
-    print("\nШАГ 5: Сохранение")
-    print("-" * 70)
+    _emit(
+        "\nШАГ 5: Сохранение",
+        "-" * 70,
+    )
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Есть ли переменные окружения — считаем один раз для шагов 5 и 6
+    env_analyzer = getattr(analyzer, 'env_analyzer', None)
+    env_ok = bool(env_analyzer and env_analyzer.env_vars)
+
+    outputs = {
+        'gitlab_ci': str(output_dir / '.gitlab-ci.yml'),
+        'vars_doc': str(output_dir / 'GITLAB_VARIABLES.md'),
+        'env_example': str(output_dir / '.env.example'),
+    }
 
-    output_dir = args.output
-    os.makedirs(output_dir, exist_ok=True)
+    # (путь, содержимое, сообщение) — собираем всё, потом пишем по очереди
+    files = [(
+        outputs['gitlab_ci'],
+        generator.assemble_config(),
+        f"✅ Конфиг сохранён: {outputs['gitlab_ci']}\n",
+    )]
+
+    # ========== Документация по переменным ==========
+    if env_ok:
+        files.append((
+            outputs['vars_doc'],
+            env_analyzer.generate_gitlab_variables_documentation(),
+            f"✅ Документация по переменным: {outputs['vars_doc']}",
+        ))
+        files.append((
+            outputs['env_example'],
+            env_analyzer.generate_env_example(),
+            f"✅ Шаблон переменных: {outputs['env_example']}",
+        ))
 
-    # Сохраняем .gitlab-ci.yml
-    output_path = os.path.join(output_dir, '.gitlab-ci.yml')
     try:
-        generator.save(output_path)
+        for path, text, message in files:
+            _write_if_changed(path, text)
+            print(message)
     except Exception as e:
         print(f"❌ Ошибка сохранения: {e}")
         sys.exit(1)
 
-    # ========== Генерируем документацию по переменным ==========
-    if hasattr(analyzer, 'env_analyzer') and analyzer.env_analyzer.env_vars:
-        # GITLAB_VARIABLES.md
-        vars_doc = analyzer.env_analyzer.generate_gitlab_variables_documentation()
-        vars_doc_path = os.path.join(output_dir, 'GITLAB_VARIABLES.md')
-
-        with open(vars_doc_path, 'w', encoding='utf-8') as f:
-            f.write(vars_doc)
-
-        print(f"✅ Документация по переменным: {vars_doc_path}")
-
-        # .env.example
-        env_example = analyzer.env_analyzer.generate_env_example()
-        env_example_path = os.path.join(output_dir, '.env.example')
-
-        with open(env_example_path, 'w', encoding='utf-8') as f:
-            f.write(env_example)
-
-        print(f"✅ Шаблон переменных: {env_example_path}")
-
     # ============ Шаг 6: Итоги ============
 
-    print("\nШАГ 6: Итоги")
-    print("-" * 70)
+    _emit(
+        "\nШАГ 6: Итоги",
+        "-" * 70,
+    )
 
     generator.print_summary()
 
-    print()
-    print("=" * 70)
-    print("✅ ВСЁ ГОТОВО!")
-    print(f"📁 Результат: {output_path}")
+    _emit(
+        "",
+        "=" * 70,
+        "✅ ВСЁ ГОТОВО!",
+        f"📁 Результат: {outputs['gitlab_ci']}",
+    )
 
     # Вывод дополнительных файлов
-    if hasattr(analyzer, 'env_analyzer') and analyzer.env_analyzer.env_vars:
-        print(f"📁 Документация переменных: {vars_doc_path}")
-        print(f"📁 Шаблон .env: {env_example_path}")
-        print()
-        print("💡 Не забудьте:")
-        print("   1. Добавить переменные в GitLab CI/CD (см. GITLAB_VARIABLES.md)")
-        print("   2. Скопировать .env.example → .env для локальной разработки")
+    if env_ok:
+        _emit(
+            f"📁 Документация переменных: {outputs['vars_doc']}",
+            f"📁 Шаблон .env: {outputs['env_example']}",
+            "",
+            "💡 Не забудьте:",
+            "   1. Добавить переменные в GitLab CI/CD (см. GITLAB_VARIABLES.md)",
+            "   2. Скопировать .env.example → .env для локальной разработки",
+        )
 
     print("=" * 70)
 
     # Очистка временной директории
-    if args.repo and (args.repo.startswith('http') or args.repo.startswith('git@')):
-        try:
-            shutil.rmtree(temp_dir)
-            print(f"\n🧹 Временная директория удалена: {temp_dir}")
-        except:
-            pass
+    if is_remote:
+        temp_dir_obj.cleanup()
+        print(f"\n🧹 Временная директория удалена: {temp_dir}")
 
 
 if __name__ == '__main__':
@@ -4,10 +4,106 @@ import os
 import glob
 import json
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from itertools import islice
+from types import MappingProxyType
 from typing import Dict, List
 from jinja2 import Template
 
-from src.env_analyzer import EnvAnalyzer
+from env_analyzer import EnvAnalyzer
+
+# Регулярки для определения версий, компилируются один раз при импорте
+_PY_REQUIRES_RE = re.compile(r'python_requires.*?(3\.\d+)', re.ASCII)
+_NODE_VERSION_RE = re.compile(r'\d+', re.ASCII)
+_JAVA_SOURCE_RE = re.compile(r'<source>(1\.\d+|11|17|21)</source>', re.ASCII)
+_PHP_VERSION_RE = re.compile(r'\d+\.\d+', re.ASCII)
+# <artifactId> в pom.xml для списка зависимостей
+_ARTIFACT_ID_RE = re.compile(r'<artifactId>(.*?)</artifactId>')
+# Строка "go 1.21" в go.mod
+_GO_VERSION_RE = re.compile(r'^go [^\S\n]*(\S+)', re.MULTILINE)
+# Весь файл без обрамляющих пробелов (rust-toolchain, .ruby-version)
+_STRIPPED_RE = re.compile(r'\A\s*(.*?)\s*\Z', re.DOTALL)
+
+
+# Образы для сборки артефактов; {version} подставляется только в выбранный шаблон
+_BUILD_IMAGES = MappingProxyType({
+    'python': "python:{version}-slim",
+    'go': "golang:{version}-alpine",
+    'node': "node:{version}-alpine",
+    'typescript': "node:{version}-alpine",
+    'java': "maven:3.9-eclipse-temurin-{version}",
+    'kotlin': "maven:3.9-eclipse-temurin-{version}",
+    'php': "php:{version}-cli",
+    'rust': "rust:{version}",
+    'ruby': "ruby:{version}-alpine",
+})
+
+# Параметры сборки артефактов по языкам; общие для всех экземпляров и только для чтения
+_ARTIFACT_PATHS = MappingProxyType({
+    'python': MappingProxyType({
+        'build_command': 'python setup.py bdist_wheel',
+        'artifact_path': 'dist/*.whl',
+        'artifact_name': '*.whl',
+        'artifact_type': 'wheel'
+    }),
+    'go': MappingProxyType({
+        'build_command': 'go build -o app .',
+        'artifact_path': 'app',
+        'artifact_name': 'app',
+        'artifact_type': 'binary'
+    }),
+    'node': MappingProxyType({
+        'build_command': 'npm run build && npm pack',
+        'artifact_path': '*.tgz',
+        'artifact_name': '*.tgz',
+        'artifact_type': 'npm'
+    }),
+    'typescript': MappingProxyType({
+        'build_command': 'npm run build && npm pack',
+        'artifact_path': '*.tgz',
+        'artifact_name': '*.tgz',
+        'artifact_type': 'npm'
+    }),
+    'java': MappingProxyType({
+        'build_command': 'mvn clean package',
+        'artifact_path': 'target/*.jar',
+        'artifact_name': '*.jar',
+        'artifact_type': 'jar'
+    }),
+    'kotlin': MappingProxyType({
+        'build_command': 'mvn clean package',
+        'artifact_path': 'target/*.jar',
+        'artifact_name': '*.jar',
+        'artifact_type': 'jar'
+    }),
+    'php': MappingProxyType({
+        'build_command': 'composer install --no-dev',
+        'artifact_path': 'vendor/',
+        'artifact_name': 'vendor',
+        'artifact_type': 'composer'
+    }),
+    'rust': MappingProxyType({
+        'build_command': 'cargo build --release',
+        'artifact_path': 'target/release/app',
+        'artifact_name': 'app',
+        'artifact_type': 'binary'
+    }),
+    'ruby': MappingProxyType({
+        'build_command': 'gem build *.gemspec',
+        'artifact_path': '*.gem',
+        'artifact_name': '*.gem',
+        'artifact_type': 'gem'
+    }),
+})
+
+_DEFAULT_ARTIFACT_PATHS = MappingProxyType({
+    'build_command': 'echo "No build command"',
+    'artifact_path': '*',
+    'artifact_name': '*',
+    'artifact_type': 'unknown'
+})
 
 
 class ProjectAnalyzer:
@@ -52,6 +148,35 @@ class ProjectAnalyzer:
         },
     }
 
+    # Плоские пары (язык, маркер) в порядке LANGUAGE_MARKERS — для _detect_language
+    _HIGH_MARKERS = tuple(
+        (lang, marker) for lang, markers in LANGUAGE_MARKERS.items() for marker in markers['high']
+    )
+    _MEDIUM_MARKERS = tuple(
+        (lang, marker) for lang, markers in LANGUAGE_MARKERS.items() for marker in markers['medium']
+    )
+
+    # Манифесты, которые читают детекторы версии, фреймворка и зависимостей
+    _MANIFESTS = MappingProxyType({
+        'python': ('requirements.txt', 'pyproject.toml'),
+        'go': ('go.mod',),
+        'node': ('package.json',),
+        'typescript': ('package.json',),
+        'java': ('pom.xml', 'build.gradle', 'build.gradle.kts'),
+        'kotlin': ('pom.xml', 'build.gradle', 'build.gradle.kts'),
+        'php': ('composer.json',),
+        'rust': ('rust-toolchain',),
+        'ruby': ('.ruby-version',),
+    })
+
+    # Имена compose-файлов в порядке приоритета
+    COMPOSE_FILES = (
+        'docker-compose.yml',
+        'docker-compose.yaml',
+        'compose.yml',
+        'compose.yaml',
+    )
+
     # Фреймворки для каждого языка
     FRAMEWORK_DETECTION = {
         'python': {
@@ -248,6 +373,12 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
 """,
     }
 
+    # Шаблоны компилируются один раз при загрузке класса
+    _COMPILED_TEMPLATES = {lang: Template(src) for lang, src in DOCKERFILE_TEMPLATES.items()}
+    _FALLBACK_TEMPLATE = Template(
+        "FROM alpine:latest\nWORKDIR /app\nCOPY . .\nEXPOSE 3000\nCMD [\"/bin/sh\"]\n"
+    )
+
     def __init__(self, project_path: str = ".", docker_gen: bool = False):
         """
         Args:
@@ -257,8 +388,50 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
         self.project_path = project_path
         self.docker_gen = docker_gen
         self.data = {}
+        self._top_level = self._list_top_level()
+        # Расширения для маркеров вида '*.py'; скрытые имена glob тоже не видит
+        self._top_level_exts = frozenset(
+            os.path.splitext(name)[1] for name in self._top_level if not name.startswith('.')
+        )
         self._analyze()
 
+    def _list_top_level(self) -> frozenset:
+        """Имена в корне проекта одним чтением директории"""
+        try:
+            with os.scandir(self.project_path) as it:
+                return frozenset(entry.name for entry in it)
+        except OSError:
+            return frozenset()
+
+    def _read_manifests(self, language: str) -> Dict[str, str]:
+        """Параллельно читает манифесты языка, которые есть в корне"""
+        names = [name for name in self._MANIFESTS.get(language, ()) if name in self._top_level]
+        if not names:
+            return {}
+        # На сетевых ФС каждый open — отдельный round-trip, поэтому не по очереди
+        with ThreadPoolExecutor(max_workers=len(names)) as ex:
+            contents = ex.map(self._read_text, names)
+            return {name: text for name, text in zip(names, contents) if text is not None}
+
+    def _read_text(self, name: str):
+        """Текст файла из корня проекта; None, если прочитать не удалось"""
+        try:
+            with open(os.path.join(self.project_path, name), 'r', encoding='utf-8') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _manifest_json(self, name: str):
+        """Разобранный JSON-манифест: разбирается один раз на все детекторы"""
+        if name not in self._parsed_manifests:
+            content = self._manifests.get(name)
+            try:
+                parsed = json.loads(content) if content is not None else None
+            except json.JSONDecodeError:
+                parsed = None
+            self._parsed_manifests[name] = parsed
+        return self._parsed_manifests[name]
+
     def _analyze(self):
         """Главный метод анализа проекта"""
         print("🔍 Анализирую проект...")
@@ -270,6 +443,10 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
         if language == 'unknown':
             raise ValueError("❌ Не удалось определить язык проекта!")
 
+        # Манифесты языка нужны сразу нескольким детекторам — читаем их разом
+        self._manifests = self._read_manifests(language)
+        self._parsed_manifests = {}
+
         # 2. Определяем версию
         self.data['version'] = self._detect_version(language)
 
@@ -280,9 +457,7 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
         self.data['dependencies'] = self._detect_dependencies(language)
 
         # 5. Проверяем Dockerfile
-        self.data['dockerfile_exists'] = os.path.exists(
-            os.path.join(self.project_path, "Dockerfile")
-        )
+        self.data['dockerfile_exists'] = "Dockerfile" in self._top_level
 
         # 6. Проверяем docker-compose.yml
         self.data['docker_compose_exists'] = self._check_docker_compose()
@@ -328,34 +503,38 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
         self.data['env_summary'] = self.env_analyzer.get_summary()
 
         # ============ РАСШИРЕННЫЙ ВЫВОД ============
-        print(f"\n{'=' * 70}")
-        print("📋 АНАЛИЗ ПРОЕКТА")
-        print(f"{'=' * 70}")
-        print(f"✅ Язык: {language}")
-        print(f"✅ Версия: {self.data['version']}")
+        # Собираем отчёт и выводим одним write
+        out = []
+        out.append(f"\n{'=' * 70}")
+        out.append("📋 АНАЛИЗ ПРОЕКТА")
+        out.append(f"{'=' * 70}")
+        out.append(f"✅ Язык: {language}")
+        out.append(f"✅ Версия: {self.data['version']}")
 
         # Вывод фреймворка
         if self.data.get('framework'):
-            print(f"✅ Фреймворк: {self.data['framework']}")
+            out.append(f"✅ Фреймворк: {self.data['framework']}")
         else:
-            print(f"⚠️  Фреймворк: Не обнаружен (будет определён SonarQube)")
+            out.append(f"⚠️  Фреймворк: Не обнаружен (будет определён SonarQube)")
 
         # Вывод топ зависимостей
         if self.data.get('dependencies'):
             deps_count = len(self.data['dependencies'])
-            print(f"✅ Основные зависимости ({deps_count}):")
+            out.append(f"✅ Основные зависимости ({deps_count}):")
             for dep in self.data['dependencies'][:5]:
-                print(f"   → {dep}")
+                out.append(f"   → {dep}")
             if deps_count > 5:
-                print(f"   ... и ещё {deps_count - 5}")
+                out.append(f"   ... и ещё {deps_count - 5}")
 
-        print(f"✅ Dockerfile: {'Найден ✅' if self.data['dockerfile_exists'] else 'Не найден ❌'}")
-        print(f"✅ docker-compose.yml: {'Найден ✅' if self.data['docker_compose_exists'] else 'Не найден ❌'}")
+        out.append(f"✅ Dockerfile: {'Найден ✅' if self.data['dockerfile_exists'] else 'Не найден ❌'}")
+        out.append(f"✅ docker-compose.yml: {'Найден ✅' if self.data['docker_compose_exists'] else 'Не найден ❌'}")
 
         if self.data.get('is_monorepo'):
-            print(f"✅ Тип проекта: Monorepo ({len(self.data['services'])} сервисов)")
+            out.append(f"✅ Тип проекта: Monorepo ({len(self.data['services'])} сервисов)")
+
+        out.append(f"{'=' * 70}\n")
 
-        print(f"{'=' * 70}\n")
+        sys.stdout.write("\n".join(out) + "\n")
 
     def _detect_framework(self, language: str) -> str:
         """Определяет используемый фреймворк"""
@@ -377,30 +556,20 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
 
     def _detect_go_framework(self, frameworks: Dict) -> str:
         """Определяет Go фреймворк"""
-        go_mod = os.path.join(self.project_path, "go.mod")
-        if os.path.exists(go_mod):
-            with open(go_mod, 'r', encoding='utf-8') as f:
-                content = f.read()
-                for framework, markers in frameworks.items():
-                    if any(marker in content for marker in markers):
-                        return framework
+        content = self._manifests.get("go.mod")
+        if content is not None:
+            for framework, markers in frameworks.items():
+                if any(marker in content for marker in markers):
+                    return framework
         return None
 
     def _detect_python_framework(self, frameworks: Dict) -> str:
         """Определяет Python фреймворк"""
-        req_file = os.path.join(self.project_path, "requirements.txt")
-        if os.path.exists(req_file):
-            with open(req_file, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-                for framework, markers in frameworks.items():
-                    if any(marker.lower() in content for marker in markers):
-                        return framework
-
-        # Проверяем pyproject.toml
-        pyproject = os.path.join(self.project_path, "pyproject.toml")
-        if os.path.exists(pyproject):
-            with open(pyproject, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
+        # requirements.txt, затем pyproject.toml
+        for manifest in ("requirements.txt", "pyproject.toml"):
+            content = self._manifests.get(manifest)
+            if content is not None:
+                content = content.lower()
                 for framework, markers in frameworks.items():
                     if any(marker.lower() in content for marker in markers):
                         return framework
@@ -408,39 +577,26 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
 
     def _detect_node_framework(self, frameworks: Dict) -> str:
         """Определяет Node.js/TypeScript фреймворк"""
-        pkg_json = os.path.join(self.project_path, "package.json")
-        if os.path.exists(pkg_json):
+        pkg = self._manifest_json("package.json")
+        if pkg is not None:
             try:
-                with open(pkg_json, 'r', encoding='utf-8') as f:
-                    pkg = json.load(f)
-                    deps = {**pkg.get('dependencies', {}), **pkg.get('devDependencies', {})}
-                    for framework, markers in frameworks.items():
-                        if any(marker in deps for marker in markers):
-                            return framework
-            except:
+                deps = {**pkg.get('dependencies', {}), **pkg.get('devDependencies', {})}
+                for framework, markers in frameworks.items():
+                    if any(marker in deps for marker in markers):
+                        return framework
+            except (TypeError, AttributeError):
                 pass
         return None
 
     def _detect_java_framework(self, frameworks: Dict) -> str:
         """Определяет Java/Kotlin фреймворк"""
-        # Проверяем pom.xml
-        pom_xml = os.path.join(self.project_path, "pom.xml")
-        if os.path.exists(pom_xml):
-            with open(pom_xml, 'r', encoding='utf-8') as f:
-                content = f.read()
+        # pom.xml, затем build.gradle
+        for manifest in ("pom.xml", "build.gradle", "build.gradle.kts"):
+            content = self._manifests.get(manifest)
+            if content is not None:
                 for framework, markers in frameworks.items():
                     if any(marker in content for marker in markers):
                         return framework
-
-        # Проверяем build.gradle
-        for gradle_file in ['build.gradle', 'build.gradle.kts']:
-            gradle_path = os.path.join(self.project_path, gradle_file)
-            if os.path.exists(gradle_path):
-                with open(gradle_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    for framework, markers in frameworks.items():
-                        if any(marker in content for marker in markers):
-                            return framework
         return None
 
     def _detect_dependencies(self, language: str) -> List[str]:
@@ -448,289 +604,163 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
         deps = []
 
         if language == 'python':
-            req_file = os.path.join(self.project_path, "requirements.txt")
-            if os.path.exists(req_file):
-                with open(req_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            dep = line.split('==')[0].split('>=')[0].split('~=')[0]
-                            deps.append(dep)
+            content = self._manifests.get("requirements.txt")
+            if content is not None:
+                for line in content.splitlines():
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        dep = line.split('==')[0].split('>=')[0].split('~=')[0]
+                        deps.append(dep)
 
         elif language in ['node', 'typescript']:
-            pkg_json = os.path.join(self.project_path, "package.json")
-            if os.path.exists(pkg_json):
+            pkg = self._manifest_json("package.json")
+            if pkg is not None:
                 try:
-                    with open(pkg_json, 'r', encoding='utf-8') as f:
-                        pkg = json.load(f)
-                        deps = list(pkg.get('dependencies', {}).keys())
-                except:
+                    deps = list(pkg.get('dependencies', {}).keys())
+                except (TypeError, AttributeError):
                     pass
 
         elif language == 'go':
-            go_mod = os.path.join(self.project_path, "go.mod")
-            if os.path.exists(go_mod):
-                with open(go_mod, 'r', encoding='utf-8') as f:
-                    in_require = False
-                    for line in f:
-                        line = line.strip()
-
-                        if line.startswith('require ('):
-                            in_require = True
-                            continue
-
-                        if in_require:
-                            if line == ')':
-                                break
-                            if line and not line.startswith('//'):
-                                dep = line.split()[0] if line.split() else None
-                                if dep:
-                                    deps.append(dep)
-
-                        elif line.startswith('require ') and '(' not in line:
-                            dep = line.replace('require', '').strip().split()[0]
-                            deps.append(dep)
+            content = self._manifests.get("go.mod")
+            if content is not None:
+                in_require = False
+                for line in content.splitlines():
+                    line = line.strip()
+
+                    if line.startswith('require ('):
+                        in_require = True
+                        continue
+
+                    if in_require:
+                        if line == ')':
+                            break
+                        if line and not line.startswith('//'):
+                            dep = line.split()[0] if line.split() else None
+                            if dep:
+                                deps.append(dep)
+
+                    elif line.startswith('require ') and '(' not in line:
+                        dep = line.replace('require', '').strip().split()[0]
+                        deps.append(dep)
 
         elif language in ['java', 'kotlin']:
             # Maven pom.xml
-            pom_xml = os.path.join(self.project_path, "pom.xml")
-            if os.path.exists(pom_xml):
-                with open(pom_xml, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    artifacts = re.findall(r'<artifactId>(.*?)</artifactId>', content)
-                    deps = artifacts[:20]
+            content = self._manifests.get("pom.xml")
+            if content is not None:
+                # Берём первые совпадения, не собирая список по всему pom.xml
+                deps = [m.group(1) for m in islice(_ARTIFACT_ID_RE.finditer(content), 20)]
 
         return deps[:10]  # Топ 10
 
     def _get_build_image(self, language: str) -> str:
         """Возвращает образ для сборки артефактов"""
-        images = {
-            'python': f"python:{self.data['version']}-slim",
-            'go': f"golang:{self.data['version']}-alpine",
-            'node': f"node:{self.data['version']}-alpine",
-            'typescript': f"node:{self.data['version']}-alpine",
-            'java': f"maven:3.9-eclipse-temurin-{self.data['version']}",
-            'kotlin': f"maven:3.9-eclipse-temurin-{self.data['version']}",
-            'php': f"php:{self.data['version']}-cli",
-            'rust': f"rust:{self.data['version']}",
-            'ruby': f"ruby:{self.data['version']}-alpine",
-        }
-        return images.get(language, 'alpine:latest')
+        return _BUILD_IMAGES.get(language, 'alpine:latest').format(version=self.data['version'])
 
     def _detect_artifact_paths(self, language: str) -> Dict:
         """Определяет пути к артефактам"""
-        paths = {
-            'python': {
-                'build_command': 'python setup.py bdist_wheel',
-                'artifact_path': 'dist/*.whl',
-                'artifact_name': '*.whl',
-                'artifact_type': 'wheel'
-            },
-            'go': {
-                'build_command': 'go build -o app .',
-                'artifact_path': 'app',
-                'artifact_name': 'app',
-                'artifact_type': 'binary'
-            },
-            'node': {
-                'build_command': 'npm run build && npm pack',
-                'artifact_path': '*.tgz',
-                'artifact_name': '*.tgz',
-                'artifact_type': 'npm'
-            },
-            'typescript': {
-                'build_command': 'npm run build && npm pack',
-                'artifact_path': '*.tgz',
-                'artifact_name': '*.tgz',
-                'artifact_type': 'npm'
-            },
-            'java': {
-                'build_command': 'mvn clean package',
-                'artifact_path': 'target/*.jar',
-                'artifact_name': '*.jar',
-                'artifact_type': 'jar'
-            },
-            'kotlin': {
-                'build_command': 'mvn clean package',
-                'artifact_path': 'target/*.jar',
-                'artifact_name': '*.jar',
-                'artifact_type': 'jar'
-            },
-            'php': {
-                'build_command': 'composer install --no-dev',
-                'artifact_path': 'vendor/',
-                'artifact_name': 'vendor',
-                'artifact_type': 'composer'
-            },
-            'rust': {
-                'build_command': 'cargo build --release',
-                'artifact_path': 'target/release/app',
-                'artifact_name': 'app',
-                'artifact_type': 'binary'
-            },
-            'ruby': {
-                'build_command': 'gem build *.gemspec',
-                'artifact_path': '*.gem',
-                'artifact_name': '*.gem',
-                'artifact_type': 'gem'
-            },
-        }
-
-        return paths.get(language, {
-            'build_command': 'echo "No build command"',
-            'artifact_path': '*',
-            'artifact_name': '*',
-            'artifact_type': 'unknown'
-        })
+        return _ARTIFACT_PATHS.get(language, _DEFAULT_ARTIFACT_PATHS)
 
     def _detect_language(self) -> Dict:
         """Определяет язык проекта"""
-        priority = {'high': 3, 'medium': 2}
-        detections = {}
-
-        for language, markers in self.LANGUAGE_MARKERS.items():
-            for marker in markers['high']:
-                if self._file_exists(marker):
-                    detections[language] = ('high', marker)
-                    break
-
-            if language not in detections:
-                for marker in markers['medium']:
-                    if self._file_exists(marker):
-                        detections[language] = ('medium', marker)
-                        break
-
-        if not detections:
-            return {
-                'language': 'unknown',
-                'marker': None,
-                'confidence': 'none'
-            }
-
-        best = max(detections.items(),
-                   key=lambda x: priority.get(x[1][0], 0))
+        # high всегда побеждает medium, поэтому сначала проверяем только
+        # точные имена и выходим на первом совпадении; glob'ы — лишь если их нет.
+        # При равной уверенности выигрывает язык, стоящий раньше в LANGUAGE_MARKERS
+        for language, marker in self._HIGH_MARKERS:
+            if marker in self._top_level:
+                return {'language': language, 'marker': marker, 'confidence': 'high'}
+
+        for language, marker in self._MEDIUM_MARKERS:
+            if self._file_exists(marker):
+                return {'language': language, 'marker': marker, 'confidence': 'medium'}
 
         return {
-            'language': best[0],
-            'marker': best[1][1],
-            'confidence': best[1][0]
+            'language': 'unknown',
+            'marker': None,
+            'confidence': 'none'
         }
 
     def _file_exists(self, pattern: str) -> bool:
         """Проверяет существование файла или паттерна"""
+        # '*.ext' — проверка по множеству расширений корня, без чтения директории
+        if pattern.startswith('*.') and not any(c in pattern[2:] for c in '.*?[/'):
+            return pattern[1:] in self._top_level_exts
         if '*' in pattern:
-            return bool(glob.glob(os.path.join(self.project_path, pattern)))
+            # Достаточно первого совпадения — не собираем весь список
+            return next(glob.iglob(os.path.join(self.project_path, pattern)), None) is not None
+        # Маркеры лежат в корне — отвечаем по заранее прочитанному списку имён
+        if os.sep not in pattern and '/' not in pattern:
+            return pattern in self._top_level
         return os.path.exists(os.path.join(self.project_path, pattern))
 
     def _detect_version(self, language: str) -> str:
         """Определяет версию языка"""
-        if language == 'python':
-            return self._detect_python_version()
-        elif language == 'go':
-            return self._detect_go_version()
-        elif language in ['node', 'typescript']:
-            return self._detect_node_version()
-        elif language in ['java', 'kotlin']:
-            return self._detect_java_version()
-        elif language == 'php':
-            return self._detect_php_version()
-        elif language == 'rust':
-            return self._detect_rust_version()
-        elif language == 'ruby':
-            return self._detect_ruby_version()
-        return "latest"
-
-    def _detect_python_version(self) -> str:
-        req_file = os.path.join(self.project_path, "requirements.txt")
-        if os.path.exists(req_file):
-            with open(req_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                match = re.search(r'python_requires.*?(3\.\d+)', content)
+        rule = self._VERSION_RULES.get(language)
+        if rule is None:
+            return "latest"
+
+        manifest, pattern, default, from_json = rule
+        content = self._manifests.get(manifest)
+        if content is None:
+            return default
+
+        # JSON-манифесты: версия только из объекта верхнего уровня, не из вложенных
+        if from_json is not None:
+            return from_json(self) or default
+
+        # Одна регулярка по уже прочитанному тексту манифеста
+        match = pattern.search(content)
+        return match.group(1) if match else default
+
+    def _node_version_from_json(self) -> str:
+        """engines.node верхнего уровня из разобранного package.json"""
+        pkg = self._manifest_json("package.json")
+        try:
+            if pkg is not None and 'engines' in pkg and 'node' in pkg['engines']:
+                match = _NODE_VERSION_RE.search(pkg['engines']['node'])
                 if match:
-                    return match.group(1)
-        return "3.11"
-
-    def _detect_go_version(self) -> str:
-        go_mod = os.path.join(self.project_path, "go.mod")
-        if os.path.exists(go_mod):
-            with open(go_mod, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.startswith('go '):
-                        return line.split()[1].strip()
-        return "1.21"
-
-    def _detect_node_version(self) -> str:
-        pkg_json = os.path.join(self.project_path, "package.json")
-        if os.path.exists(pkg_json):
-            try:
-                with open(pkg_json, 'r', encoding='utf-8') as f:
-                    pkg = json.load(f)
-                    if 'engines' in pkg and 'node' in pkg['engines']:
-                        match = re.search(r'\d+', pkg['engines']['node'])
-                        if match:
-                            return match.group()
-            except:
-                pass
-        return "20"
-
-    def _detect_java_version(self) -> str:
-        pom_xml = os.path.join(self.project_path, "pom.xml")
-        if os.path.exists(pom_xml):
-            with open(pom_xml, 'r', encoding='utf-8') as f:
-                content = f.read()
-                match = re.search(r'<source>(1\.\d+|11|17|21)</source>', content)
+                    return match.group()
+        except (TypeError, AttributeError):
+            pass
+        return None
+
+    def _php_version_from_json(self) -> str:
+        """require.php верхнего уровня из разобранного composer.json"""
+        data = self._manifest_json("composer.json")
+        try:
+            if data is not None and 'require' in data and 'php' in data['require']:
+                match = _PHP_VERSION_RE.search(data['require']['php'])
                 if match:
-                    return match.group(1)
-        return "17"
+                    return match.group()
+        except (TypeError, AttributeError):
+            pass
+        return None
 
-    def _detect_php_version(self) -> str:
-        composer = os.path.join(self.project_path, "composer.json")
-        if os.path.exists(composer):
-            try:
-                with open(composer, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if 'require' in data and 'php' in data['require']:
-                        match = re.search(r'\d+\.\d+', data['require']['php'])
-                        if match:
-                            return match.group()
-            except:
-                pass
-        return "8.2"
-
-    def _detect_rust_version(self) -> str:
-        rust_toolchain = os.path.join(self.project_path, "rust-toolchain")
-        if os.path.exists(rust_toolchain):
-            with open(rust_toolchain, 'r', encoding='utf-8') as f:
-                return f.read().strip()
-        return "latest"
-
-    def _detect_ruby_version(self) -> str:
-        ruby_version = os.path.join(self.project_path, ".ruby-version")
-        if os.path.exists(ruby_version):
-            with open(ruby_version, 'r', encoding='utf-8') as f:
-                return f.read().strip()
-        return "3.2"
+    # Язык -> (манифест, регулярка с версией в группе 1, версия по умолчанию,
+    # разбор JSON-манифеста или None); объявлено после методов, чтобы ссылаться на них
+    _VERSION_RULES = MappingProxyType({
+        'python': ('requirements.txt', _PY_REQUIRES_RE, "3.11", None),
+        'go': ('go.mod', _GO_VERSION_RE, "1.21", None),
+        'node': ('package.json', None, "20", _node_version_from_json),
+        'typescript': ('package.json', None, "20", _node_version_from_json),
+        'java': ('pom.xml', _JAVA_SOURCE_RE, "17", None),
+        'kotlin': ('pom.xml', _JAVA_SOURCE_RE, "17", None),
+        'php': ('composer.json', None, "8.2", _php_version_from_json),
+        'rust': ('rust-toolchain', _STRIPPED_RE, "latest", None),
+        'ruby': ('.ruby-version', _STRIPPED_RE, "3.2", None),
+    })
 
     def _generate_dockerfile(self, language: str):
         """Генерирует Dockerfile"""
         version = self.data['version']
-        template_str = self.DOCKERFILE_TEMPLATES.get(
-            language,
-            f"FROM alpine:latest\nWORKDIR /app\nCOPY . .\nEXPOSE 3000\nCMD [\"/bin/sh\"]\n"
-        )
-
-        template = Template(template_str)
-        version_short = '.'.join(version.split('.')[:2])
-
-        dockerfile_content = template.render(
-            version=version,
-            version_short=version_short,
-            port=3000
-        )
+        template = self._COMPILED_TEMPLATES.get(language, self._FALLBACK_TEMPLATE)
+        context = {'version': version, 'port': 3000}
+        # version_short (путь к site-packages) есть только в python-шаблоне
+        if language == 'python':
+            context['version_short'] = '.'.join(version.split('.', 2)[:2])
 
+        # Пишем в файл по мере рендера, без промежуточной строки
         dockerfile_path = os.path.join(self.project_path, "Dockerfile")
-        with open(dockerfile_path, 'w', encoding='utf-8') as f:
-            f.write(dockerfile_content)
+        template.stream(**context).dump(dockerfile_path, encoding='utf-8')
 
         print(f"   ✅ Dockerfile создан: {dockerfile_path}")
 
@@ -742,33 +772,15 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
 
     def _check_docker_compose(self) -> bool:
         """Проверяет существование docker-compose файлов"""
-        compose_files = [
-            'docker-compose.yml',
-            'docker-compose.yaml',
-            'compose.yml',
-            'compose.yaml'
-        ]
-
-        for filename in compose_files:
-            if os.path.exists(os.path.join(self.project_path, filename)):
-                return True
-
-        return False
+        return any(filename in self._top_level for filename in self.COMPOSE_FILES)
 
     def _parse_docker_compose(self) -> Dict:
         """Парсит docker-compose.yml"""
         import yaml
 
-        compose_files = [
-            'docker-compose.yml',
-            'docker-compose.yaml',
-            'compose.yml',
-            'compose.yaml'
-        ]
-
-        for filename in compose_files:
-            filepath = os.path.join(self.project_path, filename)
-            if os.path.exists(filepath):
+        for filename in self.COMPOSE_FILES:
+            if filename in self._top_level:
+                filepath = os.path.join(self.project_path, filename)
                 try:
                     with open(filepath, 'r', encoding='utf-8') as f:
                         compose_data = yaml.safe_load(f)
@@ -802,16 +814,9 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
         """Извлекает сервисы с build директивой из docker-compose.yml"""
         import yaml
 
-        compose_files = [
-            'docker-compose.yml',
-            'docker-compose.yaml',
-            'compose.yml',
-            'compose.yaml'
-        ]
-
-        for filename in compose_files:
-            filepath = os.path.join(self.project_path, filename)
-            if os.path.exists(filepath):
+        for filename in self.COMPOSE_FILES:
+            if filename in self._top_level:
+                filepath = os.path.join(self.project_path, filename)
                 try:
                     with open(filepath, 'r', encoding='utf-8') as f:
                         compose_data = yaml.safe_load(f)
@@ -848,8 +853,9 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
 
         return []
 
-    def get_summary(self) -> Dict:
-        """Возвращает сводку"""
+    @cached_property
+    def summary(self) -> Dict:
+        """Сводка анализа: self.data заполняется в __init__, поэтому считаем один раз"""
         return {
             'language': self.data['language_info']['language'],
             'version': self.data['version'],
@@ -865,3 +871,7 @@ CMD ["rails", "server", "-b", "0.0.0.0", "-p", "3000"]
             'artifact_paths': self.data.get('artifact_paths'),
             'language_info': self.data['language_info'],
         }
+
+    def get_summary(self) -> Dict:
+        """Возвращает сводку"""
+        return self.summary